@@ -1,22 +1,146 @@
+import asyncio
+import sys
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, fields
+from typing import Protocol
+
+# Values of the `*_agent_status` fields. Interned, so agents and the planner
+# share one object per status and checks usually resolve on identity.
+STATUS_SUCCESS = sys.intern("Success")
+STATUS_PARTIAL_DATA = sys.intern("Partial Data")
+STATUS_ERROR = sys.intern("Error")
+STATUS_TIMEOUT = sys.intern("Timeout")
+STATUS_SKIPPED = sys.intern("Skipped")
+
+# Statuses meaning an agent produced none of its output.
+FAILED_AGENT_STATUSES = (STATUS_ERROR, STATUS_TIMEOUT)
+
+@dataclass(slots=True)
+class PipelineState:
+    """
+    The data passed through the agents of a plan. Each agent reads the fields
+    filled in by the agents before it and sets its own; fields that no agent
+    has set yet are None.
+    """
+    # --- SpaceXAgent ---
+    spacex_mission_name: str | None = None
+    spacex_launch_date_utc: str | None = None
+    spacex_rocket_name: str | None = None
+    spacex_launch_site_name: str | None = None
+    spacex_launch_pad_latitude: float | None = None
+    spacex_launch_pad_longitude: float | None = None
+    spacex_agent_status: str | None = None
+    spacex_agent_error_message: str | None = None
+
+    # --- WeatherAgent ---
+    weather_conditions: str | None = None
+    weather_temperature_celsius: float | None = None
+    weather_humidity_percent: float | None = None
+    weather_wind_speed_mps: float | None = None
+    weather_rain_1h_mm: float | None = None
+    weather_agent_status: str | None = None
+    weather_agent_error_message: str | None = None
+
+    # --- SummaryAgent ---
+    summary_text: str | None = None
+    summary_agent_status: str | None = None
+    summary_agent_error_message: str | None = None
+
+    # --- Planner ---
+    planner_error: str | None = None
+    status: str | None = None
+
+    def update(self, values: dict) -> None:
+        """
+        Sets several fields at once.
+
+        Args:
+            values: A mapping of field name to value. Unknown field names
+                    raise AttributeError.
+        """
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def setdefaults(self, values: dict) -> None:
+        """
+        Like `update`, but only sets the fields that are still None.
+
+        Args:
+            values: A mapping of field name to default value.
+        """
+        for name, value in values.items():
+            if getattr(self, name) is None:
+                setattr(self, name, value)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the fields that have been set (i.e., are not None) as a
+        dictionary, in declaration order. Used for printing and JSON output.
+        """
+        result = {}
+        for name in _PIPELINE_STATE_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                result[name] = value
+        return result
+
+# Field names in declaration order, computed once rather than on every `to_dict`.
+_PIPELINE_STATE_FIELDS = tuple(field.name for field in fields(PipelineState))
+
+class AgentExecutionError(Exception):
+    """
+    Raised by an agent for a failure the planner should report in the
+    result (as `planner_error`) rather than let propagate.
+    """
+
+class InvalidResponseError(AgentExecutionError):
+    """
+    Raised when an API returns valid JSON of the wrong shape (e.g., a list or
+    null where an object is expected).
+    """
+
+class Agent(Protocol):
+    """
+    The interface the planner relies on: anything with a matching `execute`
+    method can be scheduled, whether or not it subclasses `BaseAgent`.
+    """
+
+    def execute(self, state: PipelineState) -> PipelineState: ...
 
 class BaseAgent(ABC):
     """
     Abstract base class for all agents in the multi-agent system.
-    Each agent is responsible for a specific task and enriches the data
+    Each agent is responsible for a specific task and enriches the state
     it receives.
     """
 
     @abstractmethod
-    def execute(self, data: dict) -> dict:
+    def execute(self, state: PipelineState) -> PipelineState:
         """
         Executes the agent's task.
 
         Args:
-            data: A dictionary containing data from previous agents or initial input.
+            state: The pipeline state, holding data from previous agents.
 
         Returns:
-            A dictionary containing the original data enriched with the results
-            of this agent's task.
+            The same state object, enriched in place with the results of
+            this agent's task.
         """
         pass
+
+    async def execute_async(self, state: PipelineState) -> PipelineState:
+        """
+        Awaitable variant of `execute`, used by the planner's asyncio scheduler.
+
+        The default implementation runs the blocking `execute` in a worker
+        thread, so the event loop stays free to drive other agents (or other
+        goals) while this agent waits on the network. Agents with a natively
+        asynchronous implementation can override it.
+
+        Args:
+            state: The pipeline state, holding data from previous agents.
+
+        Returns:
+            The same state object as `execute` would return.
+        """
+        return await asyncio.to_thread(self.execute, state)
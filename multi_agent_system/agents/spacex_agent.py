@@ -1,5 +1,24 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
 import requests
-from .base_agent import BaseAgent
+from utils.http_cache import TTLCache
+from utils.http_session import REQUEST_TIMEOUT, get_session
+from .base_agent import (
+    BaseAgent, InvalidResponseError, PipelineState, STATUS_ERROR, STATUS_SUCCESS, STATUS_TIMEOUT,
+)
+
+# Shared across SpaceXAgent instances, keyed by request URL.
+_RESPONSE_CACHE = TTLCache()
+
+# Placeholders filled in after an invalid response, so the output keeps its structure.
+_SPACEX_ERROR_DEFAULTS = {
+    "spacex_mission_name": "Error fetching data",
+    "spacex_launch_date_utc": "Error fetching data",
+    "spacex_rocket_name": "Error fetching data",
+    "spacex_launch_site_name": "Error fetching data",
+}
 
 class SpaceXAgent(BaseAgent):
     """
@@ -7,79 +26,171 @@ class SpaceXAgent(BaseAgent):
     """
     API_URL_NEXT_LAUNCH = "https://api.spacexdata.com/v4/launches/next"
     API_URL_LAUNCHPADS = "https://api.spacexdata.com/v4/launchpads/{id}"
+    API_URL_ROCKETS = "https://api.spacexdata.com/v4/rockets/{id}"
+
+    # How long responses are served from the cache, in seconds.
+    NEXT_LAUNCH_TTL = 300      # The next launch can change within hours.
+    DETAILS_TTL = 86400        # Rocket and launchpad metadata are essentially static.
 
-    def execute(self, data: dict) -> dict:
+    # (connect, read) timeouts; see utils/http_session.py. Overridable per instance.
+    REQUEST_TIMEOUT = REQUEST_TIMEOUT
+
+    def __init__(self, cache: TTLCache = None, session: requests.Session = None):
         """
-        Fetches the next SpaceX launch details and adds them to the data dictionary.
+        Initializes the SpaceXAgent with a pooled HTTP session, so the
+        next-launch, rocket and launchpad requests reuse connections
+        instead of opening a new TCP+TLS connection per call.
 
         Args:
-            data: A dictionary, potentially containing data from previous agents.
+            cache: Cache for API responses. Defaults to a cache shared by all
+                   SpaceXAgent instances.
+            session: HTTP session to send requests with. Defaults to the
+                     process-wide session from `utils.http_session`.
+        """
+        self.cache = cache if cache is not None else _RESPONSE_CACHE
+        self.session = session if session is not None else get_session()
+        # Worker pool for the follow-up lookups (rocket, launchpad) that can run concurrently.
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        # Future for a next-launch request started early by `prefetch_next_launch`,
+        # and the time.monotonic() timestamp at which it was started.
+        self._prefetched_next = None
+        self._prefetched_at = 0.0
+
+    def close(self):
+        """
+        Shuts down the worker pool. The HTTP session is left open, since it
+        is shared with other agents; see `utils.http_session.close_session`.
+        """
+        self.executor.shutdown(wait=False)
+
+    def prefetch_next_launch(self):
+        """
+        Starts the next-launch request in the background, so it overlaps with
+        whatever the caller does before `execute` runs (e.g., setting up the
+        other agents). The next `execute` call uses its result, unless it is
+        older than `NEXT_LAUNCH_TTL` by then.
+        """
+        self._prefetched_at = time.monotonic()
+        self._prefetched_next = self.executor.submit(
+            self._get_json, self.API_URL_NEXT_LAUNCH, self.NEXT_LAUNCH_TTL
+        )
+
+    def _get_json(self, url: str, ttl: float) -> dict:
+        """
+        Returns the decoded JSON body for a GET request, served from the
+        cache while the previous response for `url` is younger than `ttl`.
+
+        Raises:
+            requests.exceptions.RequestException: On connection or HTTP errors.
+        """
+        return self.cache.get_or_fetch(url, ttl=ttl, fetcher=lambda: self._fetch_json(url))
+
+    def _fetch_json(self, url: str) -> dict:
+        """
+        Performs a GET request and returns the decoded JSON body.
+
+        Raises:
+            InvalidResponseError: If the body is not a JSON object.
+        """
+        response = self.session.get(url, timeout=self.REQUEST_TIMEOUT)
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        data = orjson.loads(response.content)
+        if not isinstance(data, dict):
+            raise InvalidResponseError(f"Expected a JSON object from {url}, got {type(data).__name__}")
+        return data
+
+    def execute(self, state: PipelineState) -> PipelineState:
+        """
+        Fetches the next SpaceX launch details and sets them on the pipeline state.
+
+        Args:
+            state: The pipeline state, potentially containing data from previous agents.
 
         Returns:
-            A dictionary enriched with SpaceX launch information.
-            Expected keys: `spacex_mission_name`, `spacex_launch_date_utc`,
-                           `spacex_rocket_name`, `spacex_launch_site_name`,
-                           `spacex_launch_pad_latitude`, `spacex_launch_pad_longitude`.
+            The state enriched with SpaceX launch information.
+            Fields set: `spacex_mission_name`, `spacex_launch_date_utc`,
+                        `spacex_rocket_name`, `spacex_launch_site_name`,
+                        `spacex_launch_pad_latitude`, `spacex_launch_pad_longitude`.
         """
         try:
-            response = requests.get(self.API_URL_NEXT_LAUNCH)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            launch_data = response.json()
+            prefetched, self._prefetched_next = self._prefetched_next, None
+            if prefetched is not None and time.monotonic() - self._prefetched_at > self.NEXT_LAUNCH_TTL:
+                prefetched = None  # Too old to trust; fetch again (through the cache).
+            if prefetched is not None:
+                launch_data = prefetched.result()
+            else:
+                launch_data = self._get_json(self.API_URL_NEXT_LAUNCH, self.NEXT_LAUNCH_TTL)
 
             mission_name = launch_data.get("name", "N/A")
             launch_date_utc = launch_data.get("date_utc", "N/A")
-            rocket_id = launch_data.get("rocket") # This is an ID, need to fetch rocket name
+            rocket_id = launch_data.get("rocket") # This is an ID, resolved to a name below
             launchpad_id = launch_data.get("launchpad") # This is an ID
 
-            # Placeholder for rocket name - actual API might require another call or parsing
-            # For now, let's assume we can't get the rocket name directly from /next if it's not expanded
-            # and we are not making a second call for rocket details in this version.
-            # Students might need to fetch rocket details: GET https://api.spacexdata.com/v4/rockets/{rocket_id}
-            rocket_name = f"Rocket ID: {rocket_id}" # Simplified for now
+            # The rocket and launchpad lookups only depend on the next-launch
+            # response, not on each other, so fetch them in parallel.
+            rocket_future = None
+            pad_future = None
+            if rocket_id:
+                rocket_future = self.executor.submit(
+                    self._get_json, self.API_URL_ROCKETS.format(id=rocket_id), self.DETAILS_TTL
+                )
+            if launchpad_id:
+                pad_future = self.executor.submit(
+                    self._get_json, self.API_URL_LAUNCHPADS.format(id=launchpad_id), self.DETAILS_TTL
+                )
 
+            rocket_name = "N/A"
             launch_site_name = "N/A"
             latitude = None
             longitude = None
 
-            if launchpad_id:
-                pad_response = requests.get(self.API_URL_LAUNCHPADS.format(id=launchpad_id))
-                pad_response.raise_for_status()
-                pad_data = pad_response.json()
+            if rocket_future is not None:
+                # The rocket lookup only provides a display name, so a failure
+                # falls back to the ID instead of failing the whole agent.
+                try:
+                    rocket_data = rocket_future.result()
+                    rocket_name = rocket_data.get("name", f"Rocket ID: {rocket_id}")
+                except (requests.exceptions.RequestException, orjson.JSONDecodeError, InvalidResponseError) as e:
+                    print(f"SpaceXAgent Warning: Could not fetch rocket details: {e}")
+                    rocket_name = f"Rocket ID: {rocket_id}"
+
+            if pad_future is not None:
+                pad_data = pad_future.result()
                 launch_site_name = pad_data.get("full_name", pad_data.get("name", "N/A"))
                 latitude = pad_data.get("latitude")
                 longitude = pad_data.get("longitude")
 
-            data["spacex_mission_name"] = mission_name
-            data["spacex_launch_date_utc"] = launch_date_utc
-            data["spacex_rocket_name"] = rocket_name # This will be "Rocket ID: <id>"
-            data["spacex_launch_site_name"] = launch_site_name
-            data["spacex_launch_pad_latitude"] = latitude
-            data["spacex_launch_pad_longitude"] = longitude
-            data["spacex_agent_status"] = "Success"
+            state.spacex_mission_name = mission_name
+            state.spacex_launch_date_utc = launch_date_utc
+            state.spacex_rocket_name = rocket_name
+            state.spacex_launch_site_name = launch_site_name
+            state.spacex_launch_pad_latitude = latitude
+            state.spacex_launch_pad_longitude = longitude
+            state.spacex_agent_status = STATUS_SUCCESS
 
+        except requests.exceptions.Timeout as e:
+            print(f"SpaceXAgent Error: SpaceX API request timed out: {e}")
+            state.spacex_agent_status = STATUS_TIMEOUT
+            state.spacex_agent_error_message = str(e)
         except requests.exceptions.RequestException as e:
             print(f"SpaceXAgent Error: Could not fetch data from SpaceX API: {e}")
-            data["spacex_agent_status"] = "Error"
-            data["spacex_agent_error_message"] = str(e)
-        except Exception as e:
-            print(f"SpaceXAgent Error: An unexpected error occurred: {e}")
-            data["spacex_agent_status"] = "Error"
-            data["spacex_agent_error_message"] = str(e)
-            # Ensure keys exist even in error to maintain structure, if desired
-            data.setdefault("spacex_mission_name", "Error fetching data")
-            data.setdefault("spacex_launch_date_utc", "Error fetching data")
-            # ... and so on for other keys
+            state.spacex_agent_status = STATUS_ERROR
+            state.spacex_agent_error_message = str(e)
+        except (orjson.JSONDecodeError, InvalidResponseError) as e:
+            print(f"SpaceXAgent Error: SpaceX API returned an invalid response: {e}")
+            state.spacex_agent_status = STATUS_ERROR
+            state.spacex_agent_error_message = str(e)
+            # Ensure fields are filled even in error to maintain structure, if desired
+            state.setdefaults(_SPACEX_ERROR_DEFAULTS)
 
-        return data
+        return state
 
 if __name__ == '__main__':
     # Example usage for testing the agent directly
     agent = SpaceXAgent()
-    test_data = {}
-    result = agent.execute(test_data)
+    result = agent.execute(PipelineState())
     print("SpaceX Agent Result:")
-    import json
-    print(json.dumps(result, indent=2))
+    print(orjson.dumps(result.to_dict(), option=orjson.OPT_INDENT_2).decode())
 
     # Test with an existing launchpad ID (example: Falcon 9 Block 5 Starlink Group 4-2)
     # Launchpad for Starlink Group 4-2 (launch 5eb87d4effa4a100069e91f9) is SLC-40 (5e9e4502f509094188566f88)
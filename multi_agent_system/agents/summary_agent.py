@@ -1,4 +1,8 @@
-from .base_agent import BaseAgent
+import re
+
+from .base_agent import (
+    BaseAgent, PipelineState, FAILED_AGENT_STATUSES, STATUS_PARTIAL_DATA, STATUS_SKIPPED, STATUS_SUCCESS,
+)
 
 class SummaryAgent(BaseAgent):
     """
@@ -6,46 +10,59 @@ class SummaryAgent(BaseAgent):
     from other agents (e.g., SpaceX launch details and weather conditions).
     """
 
-    def execute(self, data: dict) -> dict:
+    # Weather description keywords that suggest a delay -> reason reported in the summary.
+    DELAY_CONDITIONS = {
+        "thunderstorm": "thunderstorms",
+        "heavy rain": "heavy rain",
+    }
+    _DELAY_CONDITIONS_RE = re.compile("|".join(map(re.escape, DELAY_CONDITIONS)), re.IGNORECASE)
+
+    # WeatherAgent statuses meaning no weather data is available.
+    _NO_WEATHER_STATUSES = (*FAILED_AGENT_STATUSES, STATUS_SKIPPED)
+
+    def execute(self, state: PipelineState) -> PipelineState:
         """
-        Generates a summary string from the input data and adds it to the dictionary.
+        Generates a summary string from the pipeline state and sets it on the state.
 
         Args:
-            data: A dictionary containing data from previous agents.
-                  Expected keys from SpaceXAgent:
-                    'spacex_mission_name', 'spacex_launch_date_utc',
-                    'spacex_rocket_name', 'spacex_launch_site_name'.
-                  Expected keys from WeatherAgent:
-                    'weather_conditions', 'weather_temperature_celsius',
-                    'weather_wind_speed_mps', 'weather_rain_1h_mm'.
+            state: The pipeline state, holding data from previous agents.
+                   Expected fields from SpaceXAgent:
+                     `spacex_mission_name`, `spacex_launch_date_utc`,
+                     `spacex_rocket_name`, `spacex_launch_site_name`.
+                   Expected fields from WeatherAgent:
+                     `weather_conditions`, `weather_temperature_celsius`,
+                     `weather_wind_speed_mps`, `weather_rain_1h_mm`.
 
         Returns:
-            The data dictionary enriched with a 'summary_text' key.
+            The state with `summary_text` set, or with `summary_agent_status`
+            set to "Skipped" if both upstream agents failed.
         """
-        try:
-            # --- Extract SpaceX Data ---
-            mission_name = data.get("spacex_mission_name", "N/A")
-            launch_date_utc = data.get("spacex_launch_date_utc", "N/A")
-            rocket_name = data.get("spacex_rocket_name", "N/A") # Recall this is "Rocket ID: <id>"
-            launch_site_name = data.get("spacex_launch_site_name", "N/A")
-
-            # --- Extract Weather Data ---
-            weather_conditions = data.get("weather_conditions", "N/A")
-            temp_celsius = data.get("weather_temperature_celsius") # Can be None
-            wind_speed_mps = data.get("weather_wind_speed_mps")   # Can be None
-            rain_1h_mm = data.get("weather_rain_1h_mm", 0)        # Defaults to 0 if not present
-
-            # --- Build Summary String ---
-            summary_parts = []
-
-            if mission_name != "N/A":
-                summary_parts.append(f"The next SpaceX mission, '{mission_name}', is scheduled to launch the {rocket_name} from {launch_site_name} on {launch_date_utc}.")
-            else:
-                summary_parts.append("Information about the next SpaceX launch is currently unavailable.")
-                data["summary_text"] = " ".join(summary_parts)
-                data["summary_agent_status"] = "Partial Data" # Or success, as it summarized what it could
-                return data
-
+        if (state.spacex_agent_status in FAILED_AGENT_STATUSES
+                and state.weather_agent_status in self._NO_WEATHER_STATUSES):
+            # Nothing upstream succeeded, so there is nothing to summarize.
+            state.summary_agent_status = STATUS_SKIPPED
+            return state
+
+        # --- Extract SpaceX Data ---
+        mission_name: str = state.spacex_mission_name or "N/A"
+        launch_date_utc: str = state.spacex_launch_date_utc or "N/A"
+        rocket_name: str = state.spacex_rocket_name or "N/A"
+        launch_site_name: str = state.spacex_launch_site_name or "N/A"
+
+        # --- Extract Weather Data ---
+        weather_conditions: str = state.weather_conditions or "N/A"
+        temp_celsius: float | None = state.weather_temperature_celsius  # Can be None
+        wind_speed_mps: float | None = state.weather_wind_speed_mps     # Can be None
+        rain_1h_mm: float = state.weather_rain_1h_mm or 0               # Defaults to 0 if not set
+
+        # --- Build Summary String ---
+        summary_parts: list[str] = []
+
+        if mission_name == "N/A":
+            summary_parts.append("Information about the next SpaceX launch is currently unavailable.")
+            status = STATUS_PARTIAL_DATA # Or success, as it summarized what it could
+        else:
+            summary_parts.append(f"The next SpaceX mission, '{mission_name}', is scheduled to launch the {rocket_name} from {launch_site_name} on {launch_date_utc}.")
 
             if weather_conditions != "N/A":
                 weather_desc = f"Current weather at the launch site: {weather_conditions}"
@@ -66,34 +83,29 @@ class SummaryAgent(BaseAgent):
             RAIN_THRESHOLD_MM = 0.5  # e.g., more than 0.5mm of rain
             WIND_THRESHOLD_MPS = 10  # e.g., wind speed over 10 m/s (approx 22 mph / 36 kph)
 
-            potential_delay_reasons = []
+            potential_delay_reasons: list[str] = []
             if rain_1h_mm > RAIN_THRESHOLD_MM:
                 potential_delay_reasons.append(f"significant rain ({rain_1h_mm}mm/hr)")
 
             if wind_speed_mps is not None and wind_speed_mps > WIND_THRESHOLD_MPS:
                 potential_delay_reasons.append(f"high wind speeds ({wind_speed_mps} m/s)")
 
-            if "thunderstorm" in weather_conditions.lower():
-                 potential_delay_reasons.append("thunderstorms")
-            if "heavy rain" in weather_conditions.lower():
-                 potential_delay_reasons.append("heavy rain")
-
+            # One case-insensitive scan for all delay-prone conditions.
+            matched_conditions = {match.lower() for match in self._DELAY_CONDITIONS_RE.findall(weather_conditions)}
+            for keyword, reason in self.DELAY_CONDITIONS.items():
+                if keyword in matched_conditions:
+                    potential_delay_reasons.append(reason)
 
             if potential_delay_reasons:
                 delay_assessment = f"Potential for launch delay due to: {', '.join(potential_delay_reasons)}."
 
             summary_parts.append(delay_assessment)
+            status = STATUS_SUCCESS
 
-            data["summary_text"] = " ".join(summary_parts)
-            data["summary_agent_status"] = "Success"
-
-        except Exception as e:
-            print(f"SummaryAgent Error: An unexpected error occurred: {e}")
-            data["summary_text"] = "Could not generate summary due to an internal error."
-            data["summary_agent_status"] = "Error"
-            data["summary_agent_error_message"] = str(e)
+        state.summary_text = " ".join(summary_parts)
+        state.summary_agent_status = status
 
-        return data
+        return state
 
 if __name__ == '__main__':
     # Example usage for testing the agent directly
@@ -102,17 +114,17 @@ if __name__ == '__main__':
     test_data_ideal = {
         "spacex_mission_name": "Starlink Group 6-2",
         "spacex_launch_date_utc": "2023-10-26T12:00:00Z",
-        "spacex_rocket_name": "Falcon 9", # Actual agent gives "Rocket ID: <id>"
+        "spacex_rocket_name": "Falcon 9",
         "spacex_launch_site_name": "SLC-40, Cape Canaveral",
         "weather_conditions": "few clouds",
         "weather_temperature_celsius": 25.5,
         "weather_wind_speed_mps": 5.0,
         "weather_rain_1h_mm": 0.0
     }
-    result_ideal = agent.execute(test_data_ideal.copy())
+    result_ideal = agent.execute(PipelineState(**test_data_ideal))
     print("Summary Agent Result (Ideal Case):")
-    print(result_ideal.get("summary_text"))
-    print(f"Status: {result_ideal.get('summary_agent_status')}\n")
+    print(result_ideal.summary_text)
+    print(f"Status: {result_ideal.summary_agent_status}\n")
 
     test_data_delay_rain = {
         "spacex_mission_name": "Lunar Gateway Logistics",
@@ -124,10 +136,10 @@ if __name__ == '__main__':
         "weather_wind_speed_mps": 7.0,
         "weather_rain_1h_mm": 2.5 # Above threshold
     }
-    result_delay_rain = agent.execute(test_data_delay_rain.copy())
+    result_delay_rain = agent.execute(PipelineState(**test_data_delay_rain))
     print("Summary Agent Result (Rain Delay Case):")
-    print(result_delay_rain.get("summary_text"))
-    print(f"Status: {result_delay_rain.get('summary_agent_status')}\n")
+    print(result_delay_rain.summary_text)
+    print(f"Status: {result_delay_rain.summary_agent_status}\n")
 
     test_data_delay_wind = {
         "spacex_mission_name": "Oneweb Mission 15",
@@ -139,10 +151,10 @@ if __name__ == '__main__':
         "weather_wind_speed_mps": 15.0, # Above threshold
         "weather_rain_1h_mm": 0.0
     }
-    result_delay_wind = agent.execute(test_data_delay_wind.copy())
+    result_delay_wind = agent.execute(PipelineState(**test_data_delay_wind))
     print("Summary Agent Result (Wind Delay Case):")
-    print(result_delay_wind.get("summary_text"))
-    print(f"Status: {result_delay_wind.get('summary_agent_status')}\n")
+    print(result_delay_wind.summary_text)
+    print(f"Status: {result_delay_wind.summary_agent_status}\n")
 
     test_data_missing_weather = {
         "spacex_mission_name": "GPS III SV07",
@@ -151,10 +163,10 @@ if __name__ == '__main__':
         "spacex_launch_site_name": "SLC-40, Cape Canaveral",
         # Weather data is missing
     }
-    result_missing_weather = agent.execute(test_data_missing_weather.copy())
+    result_missing_weather = agent.execute(PipelineState(**test_data_missing_weather))
     print("Summary Agent Result (Missing Weather Data):")
-    print(result_missing_weather.get("summary_text"))
-    print(f"Status: {result_missing_weather.get('summary_agent_status')}\n")
+    print(result_missing_weather.summary_text)
+    print(f"Status: {result_missing_weather.summary_agent_status}\n")
 
     test_data_missing_spacex = {
         # SpaceX data is missing
@@ -163,15 +175,13 @@ if __name__ == '__main__':
         "weather_wind_speed_mps": 3.0,
         "weather_rain_1h_mm": 0.0
     }
-    result_missing_spacex = agent.execute(test_data_missing_spacex.copy())
+    result_missing_spacex = agent.execute(PipelineState(**test_data_missing_spacex))
     print("Summary Agent Result (Missing SpaceX Data):")
-    print(result_missing_spacex.get("summary_text")) # Should indicate SpaceX info unavailable
-    print(f"Status: {result_missing_spacex.get('summary_agent_status')}\n")
+    print(result_missing_spacex.summary_text) # Should indicate SpaceX info unavailable
+    print(f"Status: {result_missing_spacex.summary_agent_status}\n")
 
     test_data_empty = {}
-    result_empty = agent.execute(test_data_empty.copy())
+    result_empty = agent.execute(PipelineState(**test_data_empty))
     print("Summary Agent Result (Empty Data):")
-    print(result_empty.get("summary_text"))
-    print(f"Status: {result_empty.get('summary_agent_status')}\n")
-
-```
+    print(result_empty.summary_text)
+    print(f"Status: {result_empty.summary_agent_status}\n")
@@ -1,11 +1,37 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import orjson
 import requests
-from .base_agent import BaseAgent
+from utils.api_helpers import get_api_key
+from utils.http_cache import TTLCache
+from utils.http_session import REQUEST_TIMEOUT, get_session
+from .base_agent import (
+    BaseAgent, InvalidResponseError, PipelineState, FAILED_AGENT_STATUSES, STATUS_ERROR, STATUS_SKIPPED, STATUS_SUCCESS, STATUS_TIMEOUT,
+)
 # We'll assume a utility function will handle loading .env,
 # but for now, os.getenv will work if the variable is set.
 # from dotenv import load_dotenv # Typically you'd load this in main.py or a config module
 # load_dotenv() # Call it to load .env variables
 
+# Shared across WeatherAgent instances, keyed by rounded (lat, lon).
+_RESPONSE_CACHE = TTLCache()
+
+# Placeholders filled in after an invalid response, so the output keeps its structure.
+_WEATHER_ERROR_DEFAULTS = {
+    "weather_conditions": "Error fetching data",
+}
+
+def _default_api_key() -> str | None:
+    """
+    Returns OPENWEATHER_API_KEY from the key cache in `utils.api_helpers`.
+    This is resolved on first use rather than at import time, so a .env file
+    loaded by main.py after importing this module is still picked up, and
+    `invalidate_api_key_cache` / `load_api_keys(force=True)` reset it too.
+    """
+    return get_api_key("OPENWEATHER_API_KEY")
+
 class WeatherAgent(BaseAgent):
     """
     Agent responsible for fetching weather information from OpenWeatherMap API
@@ -13,104 +39,193 @@ class WeatherAgent(BaseAgent):
     """
     API_BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
 
-    def __init__(self, api_key: str = None):
+    # OpenWeatherMap updates current conditions roughly every 10 minutes.
+    CACHE_TTL = 600
+    # Coordinates are rounded to this many decimals (~1 km) for the cache key.
+    CACHE_KEY_PRECISION = 2
+
+    # (connect, read) timeouts; see utils/http_session.py. Overridable per instance.
+    REQUEST_TIMEOUT = REQUEST_TIMEOUT
+
+    def __init__(self, api_key: str = None, cache: TTLCache = None, session: requests.Session = None):
         """
         Initializes the WeatherAgent.
         Args:
             api_key: The OpenWeatherMap API key. If None, it tries to fetch from
                      the environment variable OPENWEATHER_API_KEY.
+            cache: Cache for API responses. Defaults to a cache shared by all
+                   WeatherAgent instances.
+            session: HTTP session to send requests with. Defaults to the
+                     process-wide session from `utils.http_session`.
         """
-        self.api_key = api_key or os.getenv("OPENWEATHER_API_KEY")
+        self.cache = cache if cache is not None else _RESPONSE_CACHE
+        self.api_key = api_key or _default_api_key()
         if not self.api_key:
             # In a real application, you might raise an error or have a fallback.
             # For this assignment, we'll print a warning. The agent will likely fail
             # if execute is called without an API key.
             print("Warning: OPENWEATHER_API_KEY not found in environment or provided.")
 
-    def execute(self, data: dict) -> dict:
+        # The query parameters other than the coordinates never change, so
+        # encode them once; `_weather_for` only appends lat/lon per request.
+        self._query_tail = urlencode({
+            "appid": self.api_key or "",
+            "units": "metric",  # For Celsius
+        })
+
+        # Session shared with the other agents, so repeated executions reuse pooled connections.
+        self.session = session if session is not None else get_session()
+        # Worker pool for `execute_batch`, which queries several locations concurrently.
+        self.executor = ThreadPoolExecutor(max_workers=8)
+
+    def close(self):
+        """
+        Shuts down the worker pool. The HTTP session is left open, since it
+        is shared with other agents; see `utils.http_session.close_session`.
+        """
+        self.executor.shutdown(wait=False)
+
+    def _fetch_weather(self, url: str) -> dict:
+        """
+        Performs the OpenWeatherMap request and returns the decoded JSON body.
+
+        Raises:
+            InvalidResponseError: If the body is not a JSON object.
+        """
+        response = self.session.get(url, timeout=self.REQUEST_TIMEOUT)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        if not isinstance(data, dict):
+            raise InvalidResponseError(f"Expected a JSON object from OpenWeatherMap, got {type(data).__name__}")
+        return data
+
+    def execute(self, state: PipelineState) -> PipelineState:
         """
-        Fetches weather data for the given latitude and longitude and adds it
-        to the data dictionary.
+        Fetches weather data for the launchpad latitude and longitude and sets
+        it on the pipeline state.
 
         Args:
-            data: A dictionary expecting 'spacex_launch_pad_latitude' and
-                  'spacex_launch_pad_longitude' keys.
+            state: The pipeline state, expecting `spacex_launch_pad_latitude`
+                   and `spacex_launch_pad_longitude` to be set.
 
         Returns:
-            A dictionary enriched with weather information.
-            Expected keys: `weather_conditions`, `weather_temperature_celsius`,
-                           `weather_humidity_percent`, `weather_wind_speed_mps`,
-                           `weather_rain_1h_mm` (if available).
+            The state enriched with weather information.
+            Fields set: `weather_conditions`, `weather_temperature_celsius`,
+                        `weather_humidity_percent`, `weather_wind_speed_mps`,
+                        `weather_rain_1h_mm` (if available).
+            `weather_agent_status` is "Timeout" if the request timed out, and
+            "Skipped" when the SpaceXAgent failed earlier.
         """
-        latitude = data.get("spacex_launch_pad_latitude")
-        longitude = data.get("spacex_launch_pad_longitude")
+        if state.spacex_agent_status in FAILED_AGENT_STATUSES:
+            # No launch site to look up; don't spend a request on missing coordinates.
+            state.weather_agent_status = STATUS_SKIPPED
+            return state
+
+        latitude = state.spacex_launch_pad_latitude
+        longitude = state.spacex_launch_pad_longitude
 
         if latitude is None or longitude is None:
-            data["weather_agent_status"] = "Error"
-            data["weather_agent_error_message"] = "Latitude or longitude missing in input data."
+            state.weather_agent_status = STATUS_ERROR
+            state.weather_agent_error_message = "Latitude or longitude missing in input data."
             print("WeatherAgent Error: Latitude or longitude missing.")
-            return data
+            return state
+
+        state.update(self.execute_batch([(latitude, longitude)])[0])
+        return state
+
+    def execute_batch(self, coords: list[tuple[float, float]]) -> list[dict]:
+        """
+        Fetches weather data for several locations at once. The requests are
+        independent, so they are issued concurrently on the agent's worker pool.
+
+        Args:
+            coords: A list of (latitude, longitude) pairs.
 
+        Returns:
+            One dictionary per input pair, in the same order, mapping the
+            `weather_*` `PipelineState` field names listed in `execute`
+            (including `weather_agent_status`) to their values.
+        """
         if not self.api_key:
-            data["weather_agent_status"] = "Error"
-            data["weather_agent_error_message"] = "OpenWeatherMap API key is missing."
             print("WeatherAgent Error: API key missing.")
-            return data
+            return [
+                {"weather_agent_status": STATUS_ERROR, "weather_agent_error_message": "OpenWeatherMap API key is missing."}
+                for _ in coords
+            ]
+
+        if len(coords) == 1:
+            # Nothing to overlap; skip the thread hand-off.
+            return [self._weather_for(*coords[0])]
+        return list(self.executor.map(lambda coord: self._weather_for(*coord), coords))
+
+    def _weather_for(self, latitude: float, longitude: float) -> dict:
+        """
+        Fetches and extracts the weather for a single location.
 
-        params = {
-            "lat": latitude,
-            "lon": longitude,
-            "appid": self.api_key,
-            "units": "metric"  # For Celsius
-        }
+        Returns:
+            A dictionary with the `weather_*` keys for this location.
+        """
+        result = {}
+        url = f"{self.API_BASE_URL}?lat={latitude}&lon={longitude}&{self._query_tail}"
 
         try:
-            response = requests.get(self.API_BASE_URL, params=params)
-            response.raise_for_status()
-            weather_data = response.json()
+            # Nearby coordinates (e.g., the same launch site) share one cached response.
+            # The cache is shared by all instances, so the key also includes the
+            # query tail (API key and units).
+            cache_key = (
+                self._query_tail,
+                round(latitude, self.CACHE_KEY_PRECISION),
+                round(longitude, self.CACHE_KEY_PRECISION),
+            )
+            weather_data = self.cache.get_or_fetch(
+                cache_key, ttl=self.CACHE_TTL, fetcher=lambda: self._fetch_weather(url)
+            )
 
             # Extract relevant weather information
             # Main weather description
             if weather_data.get("weather") and len(weather_data["weather"]) > 0:
-                data["weather_conditions"] = weather_data["weather"][0].get("description", "N/A")
+                result["weather_conditions"] = weather_data["weather"][0].get("description", "N/A")
             else:
-                data["weather_conditions"] = "N/A"
+                result["weather_conditions"] = "N/A"
 
             # Temperature
             if weather_data.get("main"):
-                data["weather_temperature_celsius"] = weather_data["main"].get("temp")
-                data["weather_humidity_percent"] = weather_data["main"].get("humidity")
+                result["weather_temperature_celsius"] = weather_data["main"].get("temp")
+                result["weather_humidity_percent"] = weather_data["main"].get("humidity")
             else:
-                data["weather_temperature_celsius"] = None
-                data["weather_humidity_percent"] = None
+                result["weather_temperature_celsius"] = None
+                result["weather_humidity_percent"] = None
 
             # Wind
             if weather_data.get("wind"):
-                data["weather_wind_speed_mps"] = weather_data["wind"].get("speed")
+                result["weather_wind_speed_mps"] = weather_data["wind"].get("speed")
             else:
-                data["weather_wind_speed_mps"] = None
+                result["weather_wind_speed_mps"] = None
 
             # Rain (rain.1h is rain volume for the last 1 hour in mm)
             if weather_data.get("rain") and "1h" in weather_data["rain"]:
-                data["weather_rain_1h_mm"] = weather_data["rain"]["1h"]
+                result["weather_rain_1h_mm"] = weather_data["rain"]["1h"]
             else:
-                data["weather_rain_1h_mm"] = 0 # Assume 0 if not present
+                result["weather_rain_1h_mm"] = 0 # Assume 0 if not present
 
-            data["weather_agent_status"] = "Success"
+            result["weather_agent_status"] = STATUS_SUCCESS
 
+        except requests.exceptions.Timeout as e:
+            print(f"WeatherAgent Error: OpenWeatherMap API request timed out: {e}")
+            result["weather_agent_status"] = STATUS_TIMEOUT
+            result["weather_agent_error_message"] = str(e)
         except requests.exceptions.RequestException as e:
             print(f"WeatherAgent Error: Could not fetch data from OpenWeatherMap API: {e}")
-            data["weather_agent_status"] = "Error"
-            data["weather_agent_error_message"] = str(e)
-        except Exception as e:
-            print(f"WeatherAgent Error: An unexpected error occurred: {e}")
-            data["weather_agent_status"] = "Error"
-            data["weather_agent_error_message"] = str(e)
-            # Ensure keys exist even in error
-            data.setdefault("weather_conditions", "Error fetching data")
-            # ... and so on
+            result["weather_agent_status"] = STATUS_ERROR
+            result["weather_agent_error_message"] = str(e)
+        except (orjson.JSONDecodeError, InvalidResponseError) as e:
+            print(f"WeatherAgent Error: OpenWeatherMap API returned an invalid response: {e}")
+            result["weather_agent_status"] = STATUS_ERROR
+            result["weather_agent_error_message"] = str(e)
+            # Ensure keys exist even in error, without overwriting values already extracted
+            result = {**_WEATHER_ERROR_DEFAULTS, **result}
 
-        return data
+        return result
 
 if __name__ == '__main__':
     # Example usage for testing the agent directly
@@ -121,27 +236,26 @@ if __name__ == '__main__':
         print("Skipping WeatherAgent test: OPENWEATHER_API_KEY not set.")
     else:
         agent = WeatherAgent() # API key will be loaded from env
-        test_data_cape = {
-            "spacex_launch_pad_latitude": 28.5619,
-            "spacex_launch_pad_longitude": -80.5773
-        }
+        test_data_cape = PipelineState(
+            spacex_launch_pad_latitude=28.5619,
+            spacex_launch_pad_longitude=-80.5773,
+        )
         result = agent.execute(test_data_cape)
         print("\nWeather Agent Result (Cape Canaveral):")
-        import json
-        print(json.dumps(result, indent=2))
+        print(orjson.dumps(result.to_dict(), option=orjson.OPT_INDENT_2).decode())
 
-        test_data_invalid = {
-            "spacex_launch_pad_latitude": None,
-            "spacex_launch_pad_longitude": -80.5773
-        }
+        test_data_invalid = PipelineState(
+            spacex_launch_pad_latitude=None,
+            spacex_launch_pad_longitude=-80.5773,
+        )
         result_invalid = agent.execute(test_data_invalid)
         print("\nWeather Agent Result (Invalid Coords):")
-        print(json.dumps(result_invalid, indent=2))
+        print(orjson.dumps(result_invalid.to_dict(), option=orjson.OPT_INDENT_2).decode())
 
         # Test with no API key (by temporarily unsetting or passing None)
         # This would require modifying the agent instantiation for a direct test,
         # or running in an env where the key is truly absent.
         # agent_no_key = WeatherAgent(api_key="INVALID_KEY_TEST") # Or force it to be None
-        # result_no_key = agent_no_key.execute(test_data_cape.copy())
+        # result_no_key = agent_no_key.execute(PipelineState(spacex_launch_pad_latitude=28.5619, spacex_launch_pad_longitude=-80.5773))
         # print("\nWeather Agent Result (Invalid API Key):")
-        # print(json.dumps(result_no_key, indent=2))
+        # print(orjson.dumps(result_no_key.to_dict(), option=orjson.OPT_INDENT_2).decode())
@@ -0,0 +1,173 @@
+"""
+Self-check for the planner's goal parsing and scheduling, using mock agents
+instead of the real API-backed ones.
+
+Run from the multi_agent_system directory:
+
+    python -m evals.planner_selftest
+"""
+import logging
+
+import requests
+
+from agents.base_agent import STATUS_ERROR, STATUS_SUCCESS, STATUS_TIMEOUT
+from planner import Planner
+
+if __name__ == '__main__':
+    logging.basicConfig(format="%(name)s: %(message)s")
+    logging.getLogger("planner").setLevel(logging.DEBUG)  # Trace the planner's scheduling decisions.
+
+    class MockAgent:
+        def __init__(self, name):
+            self.name = name
+        def execute(self, state):
+            print(f"MockAgent '{self.name}' executing with data: {state.to_dict()}")
+            setattr(state, f"{self.name}_agent_status", STATUS_SUCCESS)
+            return state
+
+    planner = Planner()
+
+    # Test parse_goal
+    goal1 = "Find the next SpaceX launch, check weather at that location, then summarize if it may be delayed."
+    sequence1 = planner.parse_goal(goal1)
+    print(f"Goal 1: '{goal1}' -> Parsed sequence: {sequence1}")
+    assert sequence1 == ('spacex', 'weather', 'summary')
+
+    goal2 = "What's the weather like and summarize the situation?"
+    sequence2 = planner.parse_goal(goal2)
+    print(f"Goal 2: '{goal2}' -> Parsed sequence: {sequence2}")
+    assert sequence2 == ('weather', 'summary')
+
+    goal3 = "Tell me about the next spacex launch."
+    sequence3 = planner.parse_goal(goal3)
+    print(f"Goal 3: '{goal3}' -> Parsed sequence: {sequence3}")
+    assert sequence3 == ('spacex',)
+
+    goal4 = "Summarize the launch status." # Assumes prior context, or needs specific agent
+    sequence4 = planner.parse_goal(goal4)
+    print(f"Goal 4: '{goal4}' -> Parsed sequence: {sequence4}")
+    assert sequence4 == ('summary',)
+
+    goal5 = "Just give me a summary."
+    sequence5 = planner.parse_goal(goal5)
+    print(f"Goal 5: '{goal5}' -> Parsed sequence: {sequence5}")
+    assert sequence5 == ('summary',)
+
+    # Mentioned in reverse dependency order: the sequence follows the goal's wording.
+    goal_reversed = "Summarize the weather forecast for the next SpaceX launch."
+    sequence_reversed = planner.parse_goal(goal_reversed)
+    print(f"Goal Reversed: '{goal_reversed}' -> Parsed sequence: {sequence_reversed}")
+    assert sequence_reversed == ('summary', 'weather', 'spacex')
+
+    goal_unknown = "Book a flight."
+    sequence_unknown = planner.parse_goal(goal_unknown)
+    print(f"Goal Unknown: '{goal_unknown}' -> Parsed sequence: {sequence_unknown}")
+    assert sequence_unknown == ()
+
+    # Test execute_plan with mock agents
+    mock_agents = {
+        "spacex": MockAgent("spacex"),
+        "weather": MockAgent("weather"),
+        "summary": MockAgent("summary")
+    }
+
+    print("\nTesting execute_plan with Goal 1:")
+    final_data1 = planner.execute_plan(goal1, mock_agents)
+    print(f"Final data for Goal 1: {final_data1}")
+    assert final_data1["status"] == "success"
+
+    # Goal 1 needs spacex, so the plan is rejected before any agent runs.
+    print("\nTesting execute_plan with Goal 1 (spacex agent missing from available):")
+    final_data_missing = planner.execute_plan(goal1, {"weather": MockAgent("weather"), "summary": MockAgent("summary")})
+    print(f"Final data for Goal 1 without spacex: {final_data_missing}")
+    assert final_data_missing["status"] == "error"
+    assert "'spacex'" in final_data_missing["planner_error"]
+    assert not any(key.endswith("_agent_status") for key in final_data_missing)
+
+    print("\nTesting execute_plan with Goal 2 (all mock agents available):")
+    final_data_goal2_all_mocks = planner.execute_plan(goal2, mock_agents)
+    print(f"Final data for Goal 2 with all mocks: {final_data_goal2_all_mocks}")
+    assert final_data_goal2_all_mocks["status"] == "success"
+    assert final_data_goal2_all_mocks["weather_agent_status"] == STATUS_SUCCESS
+    assert final_data_goal2_all_mocks["summary_agent_status"] == STATUS_SUCCESS
+    assert "spacex_agent_status" not in final_data_goal2_all_mocks  # Not part of the plan.
+
+    # The scheduler still runs the agents in dependency order, not mention order.
+    execution_order = []
+
+    class RecordingMockAgent(MockAgent):
+        def execute(self, state):
+            execution_order.append(self.name)
+            return super().execute(state)
+
+    print("\nTesting execute_plan with the reversed goal:")
+    final_data_reversed = planner.execute_plan(
+        goal_reversed, {name: RecordingMockAgent(name) for name in ("spacex", "weather", "summary")}
+    )
+    print(f"Final data for the reversed goal: {final_data_reversed} (execution order: {execution_order})")
+    assert final_data_reversed["status"] == "success"
+    assert execution_order == ['spacex', 'weather', 'summary']
+
+    print("\nTesting execute_plan with unknown goal:")
+    final_data_unknown = planner.execute_plan(goal_unknown, mock_agents)
+    print(f"Final data for unknown goal: {final_data_unknown}")
+    assert final_data_unknown["status"] == "error"
+
+    class FailingMockAgent:
+        def __init__(self, name):
+            self.name = name
+        def execute(self, state):
+            print(f"FailingMockAgent '{self.name}' executing, will report error.")
+            setattr(state, f"{self.name}_agent_status", STATUS_ERROR)
+            setattr(state, f"{self.name}_agent_error_message", "Mock failure")
+            return state
+
+    mock_agents_with_failure = {
+        "spacex": MockAgent("spacex"),
+        "weather": FailingMockAgent("weather"), # Weather agent will fail
+        "summary": MockAgent("summary")
+    }
+    print("\nTesting execute_plan with a failing agent (weather):")
+    final_data_failure = planner.execute_plan(goal1, mock_agents_with_failure)
+    print(f"Final data with failing agent: {final_data_failure}")
+    assert final_data_failure["status"] == "error_in_weather_agent"
+    assert "summary_agent_status" not in final_data_failure
+
+    class TimingOutMockAgent(MockAgent):
+        def execute(self, state):
+            print(f"TimingOutMockAgent '{self.name}' executing, will report a timeout.")
+            setattr(state, f"{self.name}_agent_status", STATUS_TIMEOUT)
+            return state
+
+    print("\nTesting execute_plan with an agent reporting a timeout (spacex):")
+    final_data_timeout = planner.execute_plan(goal1, {**mock_agents, "spacex": TimingOutMockAgent("spacex")})
+    print(f"Final data with timing out agent: {final_data_timeout}")
+    assert final_data_timeout["status"] == "error_in_spacex_agent"
+    assert "weather_agent_status" not in final_data_timeout
+
+    class RaisingMockAgent(MockAgent):
+        def __init__(self, name, error):
+            super().__init__(name)
+            self.error = error
+        def execute(self, state):
+            print(f"RaisingMockAgent '{self.name}' executing, will raise {self.error!r}.")
+            raise self.error
+
+    # Recoverable errors (e.g., network failures) are recorded in the result.
+    print("\nTesting execute_plan with an agent raising a RequestException (weather):")
+    final_data_request_error = planner.execute_plan(
+        goal1, {**mock_agents, "weather": RaisingMockAgent("weather", requests.ConnectionError("Mock network failure"))}
+    )
+    print(f"Final data with raising agent: {final_data_request_error}")
+    assert final_data_request_error["status"] == "error"
+    assert "weather" in final_data_request_error["planner_error"]
+    assert "Mock network failure" in final_data_request_error["planner_error"]
+
+    # Anything else is a bug in the agent and propagates to the caller.
+    print("\nTesting execute_plan with an agent raising a KeyError (weather):")
+    try:
+        planner.execute_plan(goal1, {**mock_agents, "weather": RaisingMockAgent("weather", KeyError("mock_key"))})
+    except KeyError as e:
+        print(f"KeyError propagated: {e!r}")
+    else:
+        raise AssertionError("KeyError raised by an agent was swallowed by the planner")
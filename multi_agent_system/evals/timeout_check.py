@@ -0,0 +1,48 @@
+"""
+Checks that a stalled API endpoint is reported as a timeout promptly: the
+SpaceXAgent is pointed at a local server that accepts connections but never
+replies, and must report "Timeout" after a single read timeout (the shared
+session does not retry read timeouts).
+
+Run from the multi_agent_system directory:
+
+    python -m evals.timeout_check
+"""
+import socket
+import threading
+import time
+
+from agents.base_agent import STATUS_TIMEOUT, PipelineState
+from agents.spacex_agent import SpaceXAgent
+from utils.http_cache import TTLCache
+
+READ_TIMEOUT = 0.5
+
+if __name__ == '__main__':
+    # A server that accepts connections and then never sends a response.
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    port = server.getsockname()[1]
+    connections = []
+
+    def accept_forever():
+        while True:
+            connection, _ = server.accept()
+            connections.append(connection)
+
+    threading.Thread(target=accept_forever, daemon=True).start()
+
+    agent = SpaceXAgent(cache=TTLCache())
+    agent.API_URL_NEXT_LAUNCH = f"http://127.0.0.1:{port}/v4/launches/next"
+    agent.REQUEST_TIMEOUT = (3.05, READ_TIMEOUT)
+
+    started = time.monotonic()
+    state = agent.execute(PipelineState())
+    elapsed = time.monotonic() - started
+    agent.close()
+
+    print(f"Status: {state.spacex_agent_status} after {elapsed:.2f} s over {len(connections)} connection(s)")
+    assert state.spacex_agent_status == STATUS_TIMEOUT
+    assert len(connections) == 1  # No retry after the read timeout.
+    assert elapsed < 3 * READ_TIMEOUT
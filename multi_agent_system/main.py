@@ -1,11 +1,21 @@
-import json
+import asyncio
+import logging
 import os # For WeatherAgent to fetch API_KEY if not passed directly
+import sys
+
+import orjson
+
+try:
+    import uvloop
+except ImportError:  # Optional speed-up; not available on Windows.
+    uvloop = None
 
 # Utility to load .env file first
 from utils.api_helpers import load_api_keys, get_api_key
+from utils.http_session import close_session, get_session
 
 # Import Agents
-from agents.base_agent import BaseAgent # Not strictly needed here, but good for context
+from agents.base_agent import BaseAgent, PipelineState
 from agents.spacex_agent import SpaceXAgent
 from agents.weather_agent import WeatherAgent
 from agents.summary_agent import SummaryAgent
@@ -13,10 +23,14 @@ from agents.summary_agent import SummaryAgent
 # Import Planner
 from planner import Planner
 
-def main():
+async def main():
     """
     Main function to orchestrate the multi-agent system.
     """
+    # Planner progress is logged at DEBUG; show warnings and errors (e.g., a
+    # halted plan) by default. Set level=logging.DEBUG to trace each agent.
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
     # Load API keys from .env file into environment variables
     # This should be one of the first things your application does.
     if load_api_keys():
@@ -33,20 +47,43 @@ def main():
         print("main.py: Warning - OPENWEATHER_API_KEY not found in environment. Weather agent may not work.")
         # The WeatherAgent has its own warning if the key is missing.
 
-    # 1. Instantiate Agents
+    # 1. Define User Goal
+    # Using the example goal from the assignment
+    user_goal = "Find the next SpaceX launch, check weather at that location, then summarize if it may be delayed."
+    # user_goal = "What's the weather and summarize?" # Test another goal
+    # user_goal = "Next SpaceX launch details please."
+
+    # 2. Instantiate Planner
+    print("\nInitializing planner...")
+    try:
+        planner = Planner()
+        print("Planner initialized.")
+    except Exception as e:
+        print(f"Error during planner initialization: {e}")
+        return
+
+    # 3. Instantiate Agents
     print("\nInitializing agents...")
     try:
-        spacex_agent = SpaceXAgent()
+        # One pooled HTTP session for every agent, so connections (and TLS
+        # sessions) to each API host are reused across agents.
+        http_session = get_session()
+        spacex_agent = SpaceXAgent(session=http_session)
+        # The next-launch request needs nothing from the other agents, so once
+        # the plan is known to include SpaceX, start it now and let it overlap
+        # with their setup.
+        if "spacex" in planner.parse_goal(user_goal):
+            spacex_agent.prefetch_next_launch()
         # WeatherAgent can take api_key directly, or load from env.
         # If openweathermap_api_key is None here, WeatherAgent will try os.getenv() again.
-        weather_agent = WeatherAgent(api_key=openweathermap_api_key)
+        weather_agent = WeatherAgent(api_key=openweathermap_api_key, session=http_session)
         summary_agent = SummaryAgent()
         print("Agents initialized.")
     except Exception as e:
         print(f"Error during agent initialization: {e}")
         return
 
-    # 2. Create available_agents dictionary
+    # 4. Create available_agents dictionary
     # The keys ('spacex', 'weather', 'summary') must match what the Planner's parse_goal produces.
     available_agents = {
         "spacex": spacex_agent,
@@ -54,38 +91,32 @@ def main():
         "summary": summary_agent
     }
 
-    # 3. Instantiate Planner
-    print("\nInitializing planner...")
-    try:
-        planner = Planner()
-        print("Planner initialized.")
-    except Exception as e:
-        print(f"Error during planner initialization: {e}")
-        return
-
-    # 4. Define User Goal
-    # Using the example goal from the assignment
-    user_goal = "Find the next SpaceX launch, check weather at that location, then summarize if it may be delayed."
-    # user_goal = "What's the weather and summarize?" # Test another goal
-    # user_goal = "Next SpaceX launch details please."
-
     print(f"\nProcessing goal: '{user_goal}'")
 
     # 5. Execute Plan
     final_result = {}
     try:
         print("\nPlanner executing plan...")
-        final_result = planner.execute_plan(user_goal, available_agents)
+        state = PipelineState()
+        final_result = await planner.execute_plan_async(user_goal, available_agents, state)
         print("Plan execution finished.")
     except Exception as e:
         print(f"An unexpected error occurred during plan execution: {e}")
         final_result = {"status": "error", "message": f"Critical error in main: {str(e)}"}
+    finally:
+        # Stop the agents' worker pools and release the shared HTTP connections.
+        spacex_agent.close()
+        weather_agent.close()
+        close_session()
 
 
     # 6. Print Results
     print("\n--- Final Result ---")
-    # Pretty print the JSON output
-    print(json.dumps(final_result, indent=2))
+    # Pretty print the JSON output. orjson produces UTF-8 bytes, so write them
+    # to the binary buffer (after flushing any text already printed).
+    sys.stdout.flush()
+    sys.stdout.buffer.write(orjson.dumps(final_result, option=orjson.OPT_INDENT_2))
+    sys.stdout.buffer.write(b"\n")
 
     if final_result.get("status") == "success" and "summary_text" in final_result:
         print("\n--- Summary Text ---")
@@ -97,5 +128,8 @@ def main():
         print("\nNo summary text produced or an error occurred before summary generation.")
 
 if __name__ == "__main__":
-    main()
-```
+    # Prefer uvloop's libuv-based event loop when it is installed.
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
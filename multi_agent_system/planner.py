@@ -4,6 +4,97 @@
 # from .agents.spacex_agent import SpaceXAgent
 # from .agents.weather_agent import WeatherAgent
 # from .agents.summary_agent import SummaryAgent # Assuming this will be created
+import asyncio
+import functools
+import logging
+import re
+import sys
+
+import requests
+from utils import goal_scan
+from agents.base_agent import (
+    FAILED_AGENT_STATUSES, Agent, AgentExecutionError, PipelineState,
+)
+
+log = logging.getLogger(__name__)
+
+# Agents each agent needs output from, when they are part of the same plan.
+# Agents without an entry (or whose dependencies are not planned) can start immediately.
+AGENT_DEPENDENCIES = {
+    "weather": {"spacex"},            # Weather needs the launchpad coordinates.
+    "summary": {"spacex", "weather"}, # Summary consolidates everything else.
+}
+
+# Exceptions from an agent that are reported in the result. Anything else is
+# a bug and propagates to the caller.
+RECOVERABLE_AGENT_ERRORS = (AgentExecutionError, requests.RequestException, TimeoutError)
+
+# Goal keywords that select each agent, in the agents' canonical order.
+# Interned so every lookup and match reuses the same string objects.
+_AGENT_KEYWORDS: tuple[tuple[str, tuple[str, ...]], ...] = tuple(
+    (sys.intern(agent_name), tuple(sys.intern(keyword) for keyword in keywords))
+    for agent_name, keywords in (
+        ("spacex", ("spacex launch", "next launch")),
+        ("weather", ("weather",)),
+        ("summary", ("summarize", "summarise", "summary")),
+    )
+)
+
+# PipelineState field holding each agent's status, precomputed so the
+# scheduler does not format it per agent run.
+_STATUS_KEYS = {
+    agent_name: sys.intern(f"{agent_name}_agent_status") for agent_name, _ in _AGENT_KEYWORDS
+}
+
+# Plan status set when an agent reports a failure, likewise precomputed.
+_HALTED_STATUSES = {
+    agent_name: sys.intern(f"error_in_{agent_name}_agent") for agent_name, _ in _AGENT_KEYWORDS
+}
+
+# One named group per agent; the group that matched identifies the agent.
+_AGENT_RE = re.compile(
+    "|".join(
+        f"(?P<{agent_name}>{'|'.join(map(re.escape, keywords))})"
+        for agent_name, keywords in _AGENT_KEYWORDS
+    ),
+    re.IGNORECASE,
+)
+
+# Plans returned for goals naming no agent or exactly one agent.
+_EMPTY_PLAN: tuple[str, ...] = ()
+_SINGLE_AGENT_PLANS = {agent_name: (agent_name,) for agent_name, _ in _AGENT_KEYWORDS}
+
+# Optional compiled scan for very long goals (see utils/goal_scan.py); None when disabled.
+_goal_scanner = goal_scan.make_scanner(_AGENT_KEYWORDS)
+
+def _parse_goal(goal_lower: str) -> tuple[str, ...]:
+    """
+    Scans a (lowercased) goal for agent keywords once and returns the agents
+    in the order the goal first mentions them. The result is an immutable
+    tuple, so cached results are returned to callers as-is.
+    """
+    # Keep the offset of each agent's first match. Execution order is still
+    # governed by AGENT_DEPENDENCIES in the scheduler.
+    if _goal_scanner is not None and len(goal_lower) >= goal_scan.MIN_GOAL_LENGTH:
+        first_offsets = _goal_scanner(goal_lower)
+    else:
+        first_offsets = {}
+        for match in _AGENT_RE.finditer(goal_lower):
+            first_offsets.setdefault(match.lastgroup, match.start())
+
+    # No match and single-agent plans (the common cases) reuse prebuilt tuples.
+    if not first_offsets:
+        return _EMPTY_PLAN
+    if len(first_offsets) == 1:
+        (agent_name,) = first_offsets
+        return _SINGLE_AGENT_PLANS[agent_name]
+
+    # Group names are re-interned so results share the _AGENT_KEYWORDS strings.
+    return tuple(sys.intern(agent_name) for agent_name in sorted(first_offsets, key=first_offsets.get))
+
+# Cached, since the same goals tend to be planned repeatedly. Long goals
+# bypass it (see `Planner.parse_goal`).
+_parse_goal_cached = functools.lru_cache(maxsize=512)(_parse_goal)
 
 class Planner:
     """
@@ -17,7 +108,7 @@ class Planner:
         # or access to a registry of available agents and their capabilities.
         pass
 
-    def parse_goal(self, goal: str) -> list[str]:
+    def parse_goal(self, goal: str) -> tuple[str, ...]:
         """
         Parses the user's goal string to determine the sequence of agents.
         This is a simplified keyword-based parser.
@@ -26,283 +117,183 @@ class Planner:
             goal: The user's natural language goal.
 
         Returns:
-            A list of strings, where each string is an agent identifier (e.g., 'spacex', 'weather').
+            A tuple of strings, where each string is an agent identifier (e.g., 'spacex', 'weather').
         """
+        # Lowercasing first lets differently-cased spellings of a goal share a cache entry.
         goal_lower = goal.lower()
-        agent_sequence = []
-
-        # Define keywords and their order preference if necessary.
-        # For this example, the order in the goal string is assumed to be the desired execution order.
-        if "spacex launch" in goal_lower or "next launch" in goal_lower:
-            agent_sequence.append("spacex")
-
-        if "weather" in goal_lower:
-            # Ensure weather comes after spacex if spacex is also present,
-            # as weather usually depends on location from spacex.
-            if "spacex" in agent_sequence and "weather" not in agent_sequence:
-                 agent_sequence.append("weather")
-            elif "spacex" not in agent_sequence: # weather as a standalone or first agent
-                 agent_sequence.append("weather")
-            # If spacex is not in sequence yet, but weather is mentioned first, it might be an issue
-            # or the goal implies weather for a pre-defined location.
-            # For now, this simple logic adds it if keyword is found.
-
-        if "summarize" in goal_lower or "summary" in goal_lower:
-            # Summary usually comes last.
-            agent_sequence.append("summary")
-
-        # Basic de-duplication while preserving order for this simple parser
-        # (e.g. if "spacex launch" and "next launch" both trigger "spacex")
-        # More robust would be to map keywords to agents and then order them.
-        ordered_agent_sequence = []
-        seen = set()
-        for agent_name in agent_sequence:
-            if agent_name not in seen:
-                ordered_agent_sequence.append(agent_name)
-                seen.add(agent_name)
-
-        # A more explicit ordering for the primary use case:
-        # "Find the next SpaceX launch, check weather at that location, then summarize if it may be delayed."
-        # This specific phrase implies an order.
-        # If "spacex" and "weather" are both present, ensure spacex is before weather.
-        # This is a bit naive and could be improved with more sophisticated parsing or explicit ordering rules.
-
-        final_sequence = []
-        if "spacex" in ordered_agent_sequence:
-            final_sequence.append("spacex")
-        if "weather" in ordered_agent_sequence:
-            if "spacex" not in final_sequence: # If spacex was not in the goal, weather can be first
-                final_sequence.append("weather")
-            elif "spacex" in final_sequence: # Ensure weather is after spacex if both present
-                 # Check if weather is already added, if not, add it.
-                 # This logic is getting complicated, a clearer keyword mapping and ordering step is better.
-                 # For now, let's simplify: if keywords are present, add in a pre-defined order if possible.
-
-                # Simplified re-ordering for the example:
-                # If 'spacex' and 'weather' are in ordered_agent_sequence,
-                # ensure 'spacex' comes before 'weather'.
-                # This is a hack for the example. A proper planner would have better dependency management.
-                pass # Already handled by the order of keyword checks above for the main example
-
-        # Rebuilding final_sequence based on a known preferred order for the demo.
-        # This part needs to be more robust for general cases.
-        # Let's try a simpler approach for `parse_goal` for now:
-
-        agent_keywords = {
-            "spacex": ["spacex launch", "next launch"],
-            "weather": ["weather"],
-            "summary": ["summarize", "summary"],
+        # Long goals (e.g., with chat history) rarely repeat, and caching them
+        # would pin up to 512 multi-kilobyte strings in memory.
+        if len(goal_lower) >= goal_scan.MIN_GOAL_LENGTH:
+            return _parse_goal(goal_lower)
+        return _parse_goal_cached(goal_lower)
+
+    def _plan_dependencies(self, agent_sequence: tuple[str, ...]) -> dict[str, set[str]]:
+        """
+        Restricts `AGENT_DEPENDENCIES` to the agents in the plan, since only
+        dependencies that are part of this plan need to be waited on.
+        """
+        planned = set(agent_sequence)
+        return {
+            agent_key: AGENT_DEPENDENCIES.get(agent_key, set()) & planned
+            for agent_key in agent_sequence
         }
 
-        # Determine presence of keywords
-        present_agents = {} # agent_name: first_occurrence_index
-        for agent_name, keywords in agent_keywords.items():
-            for keyword in keywords:
-                idx = goal_lower.find(keyword)
-                if idx != -1:
-                    if agent_name not in present_agents or idx < present_agents[agent_name]:
-                        present_agents[agent_name] = idx
-                    break # Found one keyword for this agent
-
-        # Sort detected agents by their first appearance in the goal string
-        # This assumes the user states goals in the order they want them executed.
-        sorted_detected_agents = sorted(present_agents.keys(), key=lambda agent: present_agents[agent])
-
-        # Specific dependency: if 'weather' agent is present, it often depends on 'spacex' for location.
-        # If both are present, and 'spacex' is not before 'weather', it might indicate an issue or a different intent.
-        # For the specified example "Find the next SpaceX launch, check weather...", this order is natural.
-        # This simple parser doesn't handle complex dependencies. It just identifies agents.
-        # The main example "Find the next SpaceX launch, check weather at that location, then summarize if it may be delayed."
-        # implies spacex -> weather -> summary.
-
-        # The plan asks for: For the example goal, it should produce ['spacex', 'weather', 'summary']
-        # Let's hardcode the logic for the example and make it slightly more general.
-
-        parsed_sequence = []
-        if any(kw in goal_lower for kw in agent_keywords["spacex"]):
-            parsed_sequence.append("spacex")
-        if any(kw in goal_lower for kw in agent_keywords["weather"]):
-            # If spacex is already planned, weather comes after.
-            # If not, weather can be first (e.g. "weather in New York and summarize")
-            parsed_sequence.append("weather")
-        if any(kw in goal_lower for kw in agent_keywords["summary"]):
-            parsed_sequence.append("summary")
-
-        # Ensure spacex is before weather if both are present
-        if "spacex" in parsed_sequence and "weather" in parsed_sequence:
-            s_idx = parsed_sequence.index("spacex")
-            w_idx = parsed_sequence.index("weather")
-            if w_idx < s_idx: # weather is before spacex, incorrect for dependency
-                # This indicates a flaw in sequential addition; let's rebuild based on known order
-                # For the primary example, this won't happen.
-                # A truly robust parser is beyond scope here, so this is a simplification.
-                pass
-
-
-        # The simplest parser for the prompt's example would be:
-        # If "spacex launch" or "next launch" -> add "spacex"
-        # If "weather" -> add "weather"
-        # If "summarize" or "summary" -> add "summary"
-        # This relies on the fact that available_agents will be 'spacex', 'weather', 'summary'.
-
-        # Final simplified parser based on plan's requirement for example:
-        final_ordered_sequence = []
-        if "spacex launch" in goal_lower or "next launch" in goal_lower:
-            final_ordered_sequence.append("spacex")
-        if "weather" in goal_lower:
-            final_ordered_sequence.append("weather")
-        if "summarize" in goal_lower or "summary" in goal_lower:
-            final_ordered_sequence.append("summary")
-
-        # Remove duplicates if keywords are too general / overlap, maintaining order
-        unique_sequence = []
-        for agent_key in final_ordered_sequence:
-            if agent_key not in unique_sequence:
-                unique_sequence.append(agent_key)
-
-        return unique_sequence
-
-
-    def execute_plan(self, goal: str, available_agents: dict) -> dict:
+    def execute_plan(self, goal: str, available_agents: dict[str, Agent], state: PipelineState | None = None) -> dict:
         """
-        Executes the plan based on the parsed goal by calling agents in sequence.
+        Executes the plan based on the parsed goal.
+
+        Synchronous entry point for callers without an event loop: runs
+        `execute_plan_async` to completion with `asyncio.run`. Code already
+        running inside an event loop should await `execute_plan_async` instead.
 
         Args:
             goal: The user's natural language goal.
             available_agents: A dictionary mapping agent identifiers (strings)
                               to agent instances (e.g., {'spacex': SpaceXAgent(), ...}).
+            state: The pipeline state to enrich. A fresh `PipelineState` is
+                   used if omitted.
 
         Returns:
-            A dictionary containing the accumulated data after all agents
-            in the plan have executed.
+            A dictionary of the state fields set after all agents in the
+            plan have executed (see `PipelineState.to_dict`).
         """
-        print(f"Planner received goal: '{goal}'")
+        return asyncio.run(self.execute_plan_async(goal, available_agents, state))
+
+    async def execute_plan_async(self, goal: str, available_agents: dict[str, Agent], state: PipelineState | None = None) -> dict:
+        """
+        Executes the plan based on the parsed goal, for callers running an event loop.
+
+        The agents form a dependency graph (see `AGENT_DEPENDENCIES`), executed
+        in waves: every agent whose dependencies have completed is awaited
+        together with `asyncio.gather`, so agents that do not depend on each
+        other run concurrently, then the next wave is computed. All agents
+        share (and enrich) the same `PipelineState`. Agents are driven through
+        their `execute_async` method; agents that only provide a synchronous
+        `execute` are run in a worker thread. A plan with a single agent skips
+        the scheduler and awaits that agent directly.
+
+        Args:
+            goal: The user's natural language goal.
+            available_agents: A dictionary mapping agent identifiers (strings)
+                              to agent instances (e.g., {'spacex': SpaceXAgent(), ...}).
+            state: The pipeline state to enrich. A fresh `PipelineState` is
+                   used if omitted.
+
+        Returns:
+            A dictionary of the state fields set after all agents in the
+            plan have executed (see `PipelineState.to_dict`).
+        """
+        log.debug("Received goal: '%s'", goal)
 
         agent_sequence = self.parse_goal(goal)
         if not agent_sequence:
-            print("Planner: Could not determine any agents for the goal.")
+            log.warning("Could not determine any agents for the goal.")
             return {"status": "error", "message": "No agents identified for the goal."}
 
-        print(f"Planner determined agent sequence: {agent_sequence}")
+        log.debug("Determined agent sequence: %s", agent_sequence)
 
-        current_data = {}  # Initialize data accumulator
+        if state is None:
+            state = PipelineState()  # Initialize data accumulator
 
-        for agent_key in agent_sequence:
-            agent_instance = available_agents.get(agent_key)
-            if not agent_instance:
-                print(f"Planner Error: Agent '{agent_key}' not found in available_agents.")
-                # Decide: stop, or skip and continue? For now, let's record error and stop.
-                current_data["planner_error"] = f"Agent '{agent_key}' not found."
-                current_data["status"] = "error"
-                return current_data
+        # Validate the whole plan before running anything, so a missing agent
+        # fails fast instead of after its dependencies have already run.
+        missing = [agent_key for agent_key in agent_sequence if not available_agents.get(agent_key)]
+        if missing:
+            return self._report_missing_agents(missing, state)
+        agents = {agent_key: available_agents[agent_key] for agent_key in agent_sequence}
 
-            print(f"Planner: Executing agent '{agent_key}'...")
+        if len(agent_sequence) == 1:
+            # Fast path: nothing to schedule, so await the one agent directly.
+            agent_key = agent_sequence[0]
+            agent_instance = agents[agent_key]
+            log.debug("Executing agent '%s'...", agent_key)
             try:
-                # Each agent's execute method should handle its own errors gracefully
-                # and return the updated data dictionary.
-                current_data = agent_instance.execute(current_data)
-                # Optionally, check agent-specific status if agents add it
-                agent_status_key = f"{agent_key}_agent_status"
-                if current_data.get(agent_status_key) == "Error":
-                    print(f"Planner: Agent '{agent_key}' reported an error. Halting plan.")
-                    # The error message should be within current_data from the agent itself.
-                    current_data["status"] = f"error_in_{agent_key}_agent"
-                    return current_data
-
-            except Exception as e:
-                print(f"Planner Error: An unexpected error occurred while executing agent '{agent_key}': {e}")
-                current_data["planner_error"] = f"Unexpected error during {agent_key} execution: {str(e)}"
-                current_data["status"] = "error"
-                return current_data
-
-            print(f"Planner: Agent '{agent_key}' execution complete.")
-            # print(f"Planner: Current data after {agent_key}: {current_data}") # For debugging
-
-        print("Planner: All agents executed successfully.")
-        current_data["status"] = "success"
-        return current_data
-
-if __name__ == '__main__':
-    # This is a placeholder for testing.
-    # To test planner.py directly, we'd need mock agents.
-    # The actual test will be done via main.py with real agents.
-
-    class MockAgent:
-        def __init__(self, name):
-            self.name = name
-        def execute(self, data):
-            print(f"MockAgent '{self.name}' executing with data: {data}")
-            data[f"{self.name}_data"] = f"results from {self.name}"
-            data[f"{self.name}_agent_status"] = "Success"
-            return data
-
-    planner = Planner()
-
-    # Test parse_goal
-    goal1 = "Find the next SpaceX launch, check weather at that location, then summarize if it may be delayed."
-    sequence1 = planner.parse_goal(goal1)
-    print(f"Goal 1: '{goal1}' -> Parsed sequence: {sequence1}") # Expected: ['spacex', 'weather', 'summary']
-
-    goal2 = "What's the weather like and summarize the situation?"
-    sequence2 = planner.parse_goal(goal2)
-    print(f"Goal 2: '{goal2}' -> Parsed sequence: {sequence2}") # Expected: ['weather', 'summary']
-
-    goal3 = "Tell me about the next spacex launch."
-    sequence3 = planner.parse_goal(goal3)
-    print(f"Goal 3: '{goal3}' -> Parsed sequence: {sequence3}") # Expected: ['spacex']
-
-    goal4 = "Summarize the launch status." # Assumes prior context, or needs specific agent
-    sequence4 = planner.parse_goal(goal4)
-    print(f"Goal 4: '{goal4}' -> Parsed sequence: {sequence4}") # Expected: ['summary']
-
-    goal5 = "Just give me a summary."
-    sequence5 = planner.parse_goal(goal5)
-    print(f"Goal 5: '{goal5}' -> Parsed sequence: {sequence5}") # Expected: ['summary']
-
-    goal_unknown = "Book a flight."
-    sequence_unknown = planner.parse_goal(goal_unknown)
-    print(f"Goal Unknown: '{goal_unknown}' -> Parsed sequence: {sequence_unknown}") # Expected: []
-
-    # Test execute_plan with mock agents
-    mock_agents = {
-        "spacex": MockAgent("spacex"),
-        "weather": MockAgent("weather"),
-        "summary": MockAgent("summary")
-    }
-
-    print("\nTesting execute_plan with Goal 1:")
-    final_data1 = planner.execute_plan(goal1, mock_agents)
-    print(f"Final data for Goal 1: {final_data1}")
-
-    print("\nTesting execute_plan with Goal 2 (spacex agent missing from available):")
-    # final_data2 = planner.execute_plan(goal2, {"weather": MockAgent("weather"), "summary": MockAgent("summary")})
-    # print(f"Final data for Goal 2: {final_data2}")
-
-    print("\nTesting execute_plan with Goal 2 (all mock agents available):")
-    final_data_goal2_all_mocks = planner.execute_plan(goal2, mock_agents)
-    print(f"Final data for Goal 2 with all mocks: {final_data_goal2_all_mocks}")
-
-
-    print("\nTesting execute_plan with unknown goal:")
-    final_data_unknown = planner.execute_plan(goal_unknown, mock_agents)
-    print(f"Final data for unknown goal: {final_data_unknown}")
-
-    class FailingMockAgent:
-        def __init__(self, name):
-            self.name = name
-        def execute(self, data):
-            print(f"FailingMockAgent '{self.name}' executing, will report error.")
-            data[f"{self.name}_agent_status"] = "Error"
-            data[f"{self.name}_error_message"] = "Mock failure"
-            return data
-
-    mock_agents_with_failure = {
-        "spacex": MockAgent("spacex"),
-        "weather": FailingMockAgent("weather"), # Weather agent will fail
-        "summary": MockAgent("summary")
-    }
-    print("\nTesting execute_plan with a failing agent (weather):")
-    final_data_failure = planner.execute_plan(goal1, mock_agents_with_failure)
-    print(f"Final data with failing agent: {final_data_failure}")
-
-```
+                await self._run_agent_async(agent_instance, state)
+            except RECOVERABLE_AGENT_ERRORS as e:
+                return self._report_agent_exception(agent_key, e, state)
+            if self._agent_failed(agent_key, state):
+                return state.to_dict()
+        else:
+            result = await self._run_graph_async(agent_sequence, agents, state)
+            if result is not None:
+                return result
+
+        log.debug("All agents executed successfully.")
+        state.status = "success"
+        return state.to_dict()
+
+    async def _run_graph_async(self, agent_sequence: tuple[str, ...], agents: dict[str, Agent],
+                               state: PipelineState) -> dict | None:
+        """
+        Runs the agents of a multi-agent plan in dependency waves. `agents`
+        maps every key in `agent_sequence` to its (already validated) instance.
+
+        Returns:
+            None if every agent succeeded, otherwise the result dictionary to
+            return from `execute_plan_async`.
+        """
+        dependencies = self._plan_dependencies(agent_sequence)
+        completed = set()
+        pending = list(agent_sequence)
+
+        while pending:
+            ready = [agent_key for agent_key in pending if dependencies[agent_key] <= completed]
+            for agent_key in ready:
+                pending.remove(agent_key)
+                log.debug("Executing agent '%s'...", agent_key)
+
+            results = await asyncio.gather(
+                *(self._run_agent_async(agents[agent_key], state) for agent_key in ready),
+                return_exceptions=True,
+            )
+
+            for agent_key, result in zip(ready, results):
+                if isinstance(result, RECOVERABLE_AGENT_ERRORS):
+                    return self._report_agent_exception(agent_key, result, state)
+                if isinstance(result, BaseException):
+                    raise result
+                if self._agent_failed(agent_key, state):
+                    return state.to_dict()
+                completed.add(agent_key)
+
+        return None
+
+    @staticmethod
+    def _report_missing_agents(missing: list[str], state: PipelineState) -> dict:
+        """Records that planned agents are not available and returns the result."""
+        names = ", ".join(f"'{agent_key}'" for agent_key in missing)
+        log.error("Agent(s) %s not found in available_agents.", names)
+        state.planner_error = f"Agent(s) {names} not found."
+        state.status = "error"
+        return state.to_dict()
+
+    @staticmethod
+    def _report_agent_exception(agent_key: str, error: Exception, state: PipelineState) -> dict:
+        """Records a recoverable exception raised by an agent and returns the result."""
+        log.error("Agent '%s' failed: %s", agent_key, error)
+        state.planner_error = f"Error during {agent_key} execution: {error}"
+        state.status = "error"
+        return state.to_dict()
+
+    @staticmethod
+    def _agent_failed(agent_key: str, state: PipelineState) -> bool:
+        """
+        Checks the status an agent reported. On failure, marks the plan as
+        halted and returns True; otherwise logs completion and returns False.
+        """
+        agent_status = getattr(state, _STATUS_KEYS[agent_key])
+        # Agent statuses that halt the plan, since downstream agents would lack their inputs.
+        if agent_status in FAILED_AGENT_STATUSES:
+            log.warning("Agent '%s' reported status '%s'. Halting plan.", agent_key, agent_status)
+            state.status = _HALTED_STATUSES[agent_key]
+            return True
+        log.debug("Agent '%s' execution complete.", agent_key)
+        return False
+
+    @staticmethod
+    async def _run_agent_async(agent_instance: Agent, state: PipelineState) -> PipelineState:
+        """Awaits an agent, falling back to a worker thread for synchronous-only agents."""
+        execute_async = getattr(agent_instance, "execute_async", None)
+        if execute_async is not None:
+            return await execute_async(state)
+        return await asyncio.to_thread(agent_instance.execute, state)
@@ -1,11 +1,32 @@
 import os
-from dotenv import load_dotenv
 
-def load_api_keys():
+# Keys read by the agents; snapshotted right after the .env file is loaded.
+KNOWN_API_KEYS = ("OPENWEATHER_API_KEY",)
+
+# key name -> value (or None if unset), filled by `load_api_keys` and `get_api_key`.
+_KEY_CACHE: dict[str, str | None] = {}
+
+# Result of the first `load_api_keys` call (None until it has run).
+_LOADED: bool | None = None
+
+def load_api_keys(force: bool = False):
     """
     Loads environment variables from a .env file in the project root.
-    This function should ideally be called once at the beginning of the application.
+    This function should ideally be called once at the beginning of the application;
+    later calls return the first call's result without reading the file again.
+
+    Set MAS_SKIP_DOTENV=1 when the environment is already populated (e.g.,
+    in a container) to skip the .env file, and the python-dotenv import, entirely.
+
+    Args:
+        force: Re-read the .env file even if it was already loaded. Values from
+            the file then override variables already set in the environment,
+            so edits to the file take effect.
     """
+    global _LOADED
+    if _LOADED is not None and not force:
+        return _LOADED
+
     # dotenv_path = find_dotenv() # find_dotenv will search for .env
     # if not dotenv_path:
     #     print("Warning: .env file not found.")
@@ -19,7 +40,17 @@ def load_api_keys():
     # load_dotenv() should find it if main.py (in multi_agent_system/) calls this.
     # For robustness, one might specify path: load_dotenv(Path('.') / '.env')
 
-    loaded = load_dotenv()
+    if os.environ.get("MAS_SKIP_DOTENV") == "1":
+        loaded = False
+    else:
+        # Imported here so runs that never read a .env file do not pay for it.
+        from dotenv import load_dotenv
+        loaded = load_dotenv(override=force)
+    # The .env file may have changed the environment, so re-snapshot the keys.
+    invalidate_api_key_cache()
+    for key_name in KNOWN_API_KEYS:
+        _KEY_CACHE[key_name] = os.getenv(key_name)
+    _LOADED = loaded
     # if loaded:
     #     print("Environment variables from .env loaded.")
     # else:
@@ -28,7 +59,9 @@ def load_api_keys():
 
 def get_api_key(key_name: str) -> str | None:
     """
-    Retrieves an API key from environment variables.
+    Retrieves an API key from environment variables. Each key is read from
+    the environment once and then served from a cache (see
+    `invalidate_api_key_cache`).
 
     Args:
         key_name: The name of the environment variable storing the API key.
@@ -36,7 +69,18 @@ def get_api_key(key_name: str) -> str | None:
     Returns:
         The API key string if found, otherwise None.
     """
-    return os.getenv(key_name)
+    try:
+        return _KEY_CACHE[key_name]
+    except KeyError:
+        value = _KEY_CACHE[key_name] = os.getenv(key_name)
+        return value
+
+def invalidate_api_key_cache():
+    """
+    Forgets all cached keys, so the next `get_api_key` calls read the
+    environment again (e.g., after changing os.environ in a test).
+    """
+    _KEY_CACHE.clear()
 
 if __name__ == '__main__':
     # This demonstrates how to use the functions.
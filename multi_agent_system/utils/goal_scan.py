@@ -0,0 +1,89 @@
+import os
+
+# Opt-in: numba is slow to import, so it is only loaded when requested.
+ENABLED = os.environ.get("MAS_NUMBA_GOAL_SCAN") == "1"
+
+np = None
+njit = None
+if ENABLED:
+    try:
+        import numpy as np
+        from numba import njit
+    except ImportError:  # Optional speed-up for very long goals; the planner's regex is the default.
+        pass
+
+# Goals shorter than this are scanned with the regex, which is faster until
+# the compiled loop's conversion overhead is amortized.
+MIN_GOAL_LENGTH = 4096
+
+if njit is not None:
+    @njit(cache=True)
+    def _first_offsets(buf, keywords, keyword_starts, keyword_agents, agent_count):
+        """
+        Returns, per agent, the byte offset of its first keyword match in
+        `buf` (-1 if none matched). Keyword `k` is
+        keywords[keyword_starts[k]:keyword_starts[k + 1]].
+        """
+        offsets = np.full(agent_count, -1, dtype=np.int64)
+        found = 0
+        keyword_count = keyword_agents.shape[0]
+        for i in range(buf.shape[0]):
+            for k in range(keyword_count):
+                agent = keyword_agents[k]
+                if offsets[agent] != -1:
+                    continue
+                start = keyword_starts[k]
+                length = keyword_starts[k + 1] - start
+                if i + length > buf.shape[0] or buf[i] != keywords[start]:
+                    continue
+                j = 1
+                while j < length and buf[i + j] == keywords[start + j]:
+                    j += 1
+                if j == length:
+                    offsets[agent] = i
+                    found += 1
+            if found == agent_count:
+                break
+        return offsets
+
+def make_scanner(agent_keywords):
+    """
+    Builds a Numba-compiled keyword scanner, if enabled.
+
+    The scanner is opt-in (set MAS_NUMBA_GOAL_SCAN=1) and requires numba and
+    numpy; it only pays off for goals of several kilobytes, e.g. when chat
+    history is included in the goal.
+
+    Args:
+        agent_keywords: The planner's (agent name, keywords) pairs.
+
+    Returns:
+        A function mapping a lowercased goal to {agent name: first offset}
+        for the agents it mentions, or None if the scanner is not available.
+    """
+    if njit is None:
+        return None
+
+    agent_names = [agent_name for agent_name, _ in agent_keywords]
+    encoded, starts, agents = [], [0], []
+    for agent_index, (_, keywords) in enumerate(agent_keywords):
+        for keyword in keywords:
+            encoded.append(keyword.encode())
+            starts.append(starts[-1] + len(encoded[-1]))
+            agents.append(agent_index)
+    keyword_bytes = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    keyword_starts = np.array(starts, dtype=np.int64)
+    keyword_agents = np.array(agents, dtype=np.int64)
+
+    def scan(goal_lower: str) -> dict[str, int]:
+        # Byte offsets differ from character offsets for non-ASCII goals,
+        # but they preserve the order of the matches, which is all that is used.
+        buf = np.frombuffer(goal_lower.encode(), dtype=np.uint8)
+        offsets = _first_offsets(buf, keyword_bytes, keyword_starts, keyword_agents, len(agent_names))
+        return {
+            agent_name: int(offset)
+            for agent_name, offset in zip(agent_names, offsets)
+            if offset != -1
+        }
+
+    return scan
@@ -0,0 +1,65 @@
+import threading
+import time
+
+class TTLCache:
+    """
+    A small thread-safe in-memory cache whose entries expire after a
+    per-entry time-to-live. Used by the agents to avoid re-fetching API
+    responses that change slowly (e.g., launchpad metadata).
+
+    Expired entries are purged when the cache is full, and the oldest entry
+    is evicted if that frees no room, so the cache stays bounded.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        """
+        Args:
+            max_size: Maximum number of entries kept at once.
+        """
+        self.max_size = max_size
+        # key -> (expiry timestamp, cached value), in insertion order
+        self._entries: dict = {}
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, key, ttl: float, fetcher):
+        """
+        Returns the cached value for `key`, calling `fetcher()` to refresh it
+        if it is missing or expired.
+
+        Args:
+            key: Any hashable cache key (e.g., the request URL).
+            ttl: Number of seconds the fetched value stays valid.
+            fetcher: Zero-argument callable producing the value. Exceptions it
+                     raises propagate to the caller and nothing is cached.
+
+        Returns:
+            The cached or freshly fetched value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[0]:
+                return entry[1]
+
+        # Fetch outside the lock so a slow request does not block other keys.
+        value = fetcher()
+        with self._lock:
+            now = time.monotonic()
+            # Re-insert so insertion order tracks the age of each entry.
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_size:
+                self._purge_expired(now)
+                if len(self._entries) >= self.max_size:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (now + ttl, value)
+        return value
+
+    def _purge_expired(self, now: float):
+        """Removes the entries that expired before `now`. Caller holds the lock."""
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def clear(self):
+        """Removes all cached entries."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,62 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+# Keep-alive connections kept per host. Shared by every agent, so it is sized
+# above the combined worker pools of the agents (and several goals in flight).
+POOL_MAXSIZE = 32
+
+# (connect, read) timeouts in seconds, so a stalled endpoint cannot hang the plan.
+REQUEST_TIMEOUT = (3.05, 10)
+
+_session: requests.Session | None = None
+_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide HTTP session, creating it on first use.
+
+    All agents share this session, so requests to the same host (e.g., the
+    SpaceX next-launch, rocket and launchpad endpoints) reuse one connection
+    pool, and DNS lookups and TLS handshakes are paid once per host rather
+    than once per agent.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                # Retry transient failures (rate limiting, 5xx) with backoff before
+                # giving up; the agents' except blocks remain the final fallback.
+                # Read timeouts are not retried: a stalled endpoint should surface
+                # as `ReadTimeout` after one attempt (the agents' "Timeout"
+                # status) rather than block for every retry and end as a
+                # ConnectionError. Retry-After headers are ignored, so a 429
+                # asking for a long wait cannot stall the plan; the short
+                # backoff applies instead.
+                retries = Retry(
+                    total=3,
+                    read=False,
+                    backoff_factor=0.3,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods={"GET"},
+                    respect_retry_after_header=False,
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=retries)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+def close_session():
+    """
+    Closes the shared session, if one was created. A later `get_session()`
+    call starts a fresh one.
+    """
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None